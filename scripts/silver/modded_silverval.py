@@ -1,824 +1,1160 @@
-import os
-import re
-import argparse
-from datetime import datetime
-import glob
-
-import pandas as pd
-
-# ==================
-# CONFIG / CONSTANTS
-# ==================
-
-DATA_ZONE_PATH = "/app/data_zone"
-
-# ============
-# QUALITY LOGS
-# ============
-
-quality_report: list[dict] = []
-
-# ==============================
-# LINE ITEM BUFFER (ADDED FIX)
-# ==============================
-
-operations_line_items_buffer: list[pd.DataFrame] = []
-
-
-def log_quality(
-    table: str,
-    issue_type: str,
-    details: str,
-    severity: str = "WARNING",
-) -> None:
-    """Append a data-quality issue and print it."""
-    quality_report.append(
-        {
-            "timestamp": datetime.now().isoformat(),
-            "table": table,
-            "issue_type": issue_type,
-            "details": details,
-            "severity": severity,
-        }
-    )
-    print(f" [{severity}] {table} - {issue_type}: {details}")
-
-
-def save_quality_report(silver_folder: str) -> None:
-    """Persist quality_report to CSV and print summary."""
-    if not quality_report:
-        print("\n[INFO] No quality issues (errors/warnings) logged.")
-        return
-
-    report_df = pd.DataFrame(quality_report)
-    report_path = os.path.join(
-        os.path.dirname(silver_folder), "_silver_quality_report.csv"
-    )
-    report_df.to_csv(report_path, index=False)
-
-    errors = sum(1 for r in quality_report if r["severity"] == "ERROR")
-    warnings = sum(1 for r in quality_report if r["severity"] == "WARNING")
-
-    print(f"\nQuality report saved: {report_path}")
-    print(f"Quality Summary: {errors} errors, {warnings} warnings")
-
-
-# ===========================
-# GENERIC TRANSFORM UTILITIES
-# ===========================
-
-def standardize(df: pd.DataFrame) -> pd.DataFrame:
-    """Normalize column names and fix basic inconsistencies."""
-    df.columns = (
-        df.columns
-        .str.strip()
-        .str.lower()
-        .str.replace(" ", "_", regex=False)
-        .str.replace("-", "_", regex=False)
-    )
-    return df
-
-
-def validate_required_columns(
-    df: pd.DataFrame,
-    required_cols: list[str],
-    table_name: str,
-) -> pd.DataFrame:
-    missing = [c for c in required_cols if c not in df.columns]
-    if missing:
-        log_quality(
-            table_name,
-            "MISSING_COLUMNS",
-            f"Missing required: {missing}",
-            "ERROR",
-        )
-    return df
-
-
-def check_nulls(
-    df: pd.DataFrame,
-    key_cols: list[str],
-    table_name: str,
-) -> pd.DataFrame:
-    for col in key_cols:
-        if col in df.columns:
-            null_count = df[col].isnull().sum()
-            total = len(df)
-            if null_count > 0:
-                pct = (null_count / total) * 100
-                log_quality(
-                    table_name,
-                    "NULL_VALUES",
-                    f"{col}: {null_count}/{total} ({pct:.1f}%) nulls",
-                    "WARNING",
-                )
-    return df
-
-
-def check_duplicates(
-    df: pd.DataFrame,
-    key_cols: list[str],
-    table_name: str,
-) -> int:
-    if not all(c in df.columns for c in key_cols):
-        return 0
-
-    dup_count = df.duplicated(subset=key_cols).sum()
-    if dup_count > 0:
-        log_quality(
-            table_name,
-            "DUPLICATES",
-            f"{dup_count} duplicate rows on {key_cols}",
-            "WARNING",
-        )
-    return dup_count
-
-
-def validate_data_types(
-    df: pd.DataFrame,
-    type_map: dict[str, str],
-    table_name: str,
-) -> pd.DataFrame:
-    for col, expected_type in type_map.items():
-        if col not in df.columns:
-            continue
-
-        if expected_type == "datetime":
-            before = df[col].notnull().sum()
-            df[col] = pd.to_datetime(df[col], errors="coerce")
-            after = df[col].notnull().sum()
-            invalid = before - after
-            if invalid > 0:
-                log_quality(
-                    table_name,
-                    "INVALID_DATETIME",
-                    f"{col}: {invalid} values coerced to NaT",
-                    "WARNING",
-                )
-
-        elif expected_type == "numeric":
-            before = df[col].notnull().sum()
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-            after = df[col].notnull().sum()
-            invalid = before - after
-            if invalid > 0:
-                log_quality(
-                    table_name,
-                    "INVALID_NUMERIC",
-                    f"{col}: {invalid} values coerced to NaN",
-                    "WARNING",
-                )
-    return df
-
-
-def flag_errors(table_name: str) -> None:
-    errors = [
-        r for r in quality_report
-        if r["table"] == table_name and r["severity"] == "ERROR"
-    ]
-    if errors:
-        print(f" [ERROR] {len(errors)} ERRORS flagged for {table_name}")
-
-
-# ===========================
-# QUANTITY CLEANER (FIXED)
-# ===========================
-
-def clean_quantity_column(df: pd.DataFrame) -> pd.DataFrame:
-    # Map various raw names into quantity
-    if "quantity" not in df.columns:
-        for alt in ["qty", "quantity_purchased", "order_quantity", "item_quantity"]:
-            if alt in df.columns:
-                df["quantity"] = df[alt]
-                break
-
-    if "quantity" not in df.columns:
-        df["quantity"] = pd.NA
-        return df
-
-    # If already numeric, just coerce and DO NOT force Int64 (keep float/int)
-    if pd.api.types.is_numeric_dtype(df["quantity"]):
-        df["quantity"] = pd.to_numeric(df["quantity"], errors="coerce")
-        return df
-
-    # For messy strings
-    df["quantity"] = (
-        df["quantity"]
-        .astype(str)
-        .str.extract(r"(\d+)", expand=False)
-    )
-    df["quantity"] = pd.to_numeric(df["quantity"], errors="coerce")
-    return df
-
-
-# ===========================
-# BUSINESS / CUSTOMER CLEANERS
-# ===========================
-
-def clean_business(df: pd.DataFrame, silver_folder: str, file: str) -> None:
-    table_name = "business_product"
-    print(f"\n Cleaning: {table_name}")
-
-    df = standardize(df)
-    df = validate_required_columns(df, ["product_id", "product_name"], table_name)
-    df = check_nulls(df, ["product_id"], table_name)
-
-    if "product_id" in df.columns:
-        initial_rows = len(df)
-        df.dropna(subset=["product_id"], inplace=True)
-        null_removed = initial_rows - len(df)
-        if null_removed > 0:
-            print(
-                f"  [CLEANING AUDIT] SUCCESS: Removed "
-                f"{null_removed} rows with NULL product_id."
-            )
-
-        initial_rows = len(df)
-        df = df.drop_duplicates(subset="product_id", keep="first")
-        duplicates_removed = initial_rows - len(df)
-        if duplicates_removed > 0:
-            print(
-                f"  [CLEANING AUDIT] SUCCESS: Removed "
-                f"{duplicates_removed} duplicates on product_id. "
-                f"Final Rows: {len(df)}"
-            )
-
-    check_duplicates(df, ["product_id"], table_name)
-    flag_errors(table_name)
-
-    out = "business_product.parquet"
-    df.to_parquet(os.path.join(silver_folder, out), index=False)
-    print(f" [OK] Saved: {out} ({len(df)} rows)")
-
-
-def clean_customer(df: pd.DataFrame, silver_folder: str, file: str) -> None:
-    df = standardize(df)
-
-    if "user_job" in file:
-        table_name = "customer_user_job"
-        print(f"\n Cleaning: {table_name}")
-        out = "customer_user_job.parquet"
-        key_cols = ["user_id"]
-
-    elif "user_credit_card" in file:
-        table_name = "customer_user_credit_card"
-        print(f"\n Cleaning: {table_name}")
-        out = "customer_user_credit_card.parquet"
-        key_cols = ["user_id", "credit_card_number"]
-
-    elif "user_data" in file or "user_" in file:
-        table_name = "customer_user"
-        print(f"\n Cleaning: {table_name}")
-        out = "customer_user.parquet"
-        key_cols = ["user_id"]
-
-    else:
-        print(f" [WARN] Unknown customer file pattern: {file}")
-        return
-
-    df = validate_required_columns(df, ["user_id"], table_name)
-    df = check_nulls(df, ["user_id"], table_name)
-
-    if "user_id" in df.columns:
-        initial_rows = len(df)
-        df.dropna(subset=["user_id"], inplace=True)
-        null_removed = initial_rows - len(df)
-        if null_removed > 0:
-            print(
-                f"  [CLEANING AUDIT] SUCCESS: Removed "
-                f"{null_removed} rows with NULL user_id."
-            )
-
-        initial_rows = len(df)
-        subset_keys = (
-            ["user_id"]
-            if table_name in ["customer_user", "customer_user_job"]
-            else key_cols
-        )
-        df = df.drop_duplicates(subset=subset_keys, keep="first")
-        duplicates_removed = initial_rows - len(df)
-        if duplicates_removed > 0:
-            print(
-                f"  [CLEANING AUDIT] SUCCESS: Removed "
-                f"{duplicates_removed} duplicates on {subset_keys}. "
-                f"Final Rows: {len(df)}"
-            )
-
-    check_duplicates(df, key_cols, table_name)
-
-    if "birthdate" in df.columns and table_name == "customer_user":
-        df = validate_data_types(df, {"birthdate": "datetime"}, table_name)
-
-    flag_errors(table_name)
-
-    df.to_parquet(os.path.join(silver_folder, out), index=False)
-    print(f" [OK] Saved: {out} ({len(df)} rows)")
-
-
-# =======================
-# ENTERPRISE CLEANER
-# =======================
-
-def clean_enterprise(df: pd.DataFrame, silver_folder: str, file: str) -> None:
-    df = standardize(df)
-
-    if "order_with_merchant" in file:
-        table_name = "enterprise_order_merchant_tx"
-        print(f"\n Cleaning: {table_name} (Transaction/Fact)")
-
-        rename_map: dict[str, str] = {}
-        if "merchantid" in df.columns:
-            rename_map["merchantid"] = "merchant_id"
-        if "staffid" in df.columns:
-            rename_map["staffid"] = "staff_id"
-        if "orderid" in df.columns:
-            rename_map["orderid"] = "order_id"
-        if rename_map:
-            df = df.rename(columns=rename_map)
-
-        key_cols = ["order_id", "merchant_id"]
-        df = validate_required_columns(df, key_cols, table_name)
-        df = check_nulls(df, key_cols, table_name)
-
-        if "order_id" in df.columns:
-            initial_rows = len(df)
-            df.dropna(subset=["order_id"], inplace=True)
-
-            initial_rows = len(df)
-            df = df.drop_duplicates(subset=["order_id"], keep="first")
-
-        check_duplicates(df, ["order_id"], table_name)
-        base_name = file.replace(".parquet", "").replace("enterprise_", "")
-        out = f"enterprise_{base_name}_tx.parquet"
-
-    elif "merchant_data" in file:
-        table_name = "enterprise_merchant"
-        print(f"\n Cleaning: {table_name} (Dimension)")
-        out = "enterprise_merchant.parquet"
-        key_cols = ["merchant_id"]
-
-    elif "staff_data" in file:
-        table_name = "enterprise_staff"
-        print(f"\n Cleaning: {table_name} (Dimension)")
-        out = "enterprise_staff.parquet"
-        key_cols = ["staff_id"]
-
-    else:
-        print(f" [WARN] Unknown enterprise file pattern: {file}")
-        return
-
-    if table_name in ["enterprise_merchant", "enterprise_staff"]:
-        df = validate_required_columns(df, key_cols, table_name)
-        df = check_nulls(df, key_cols, table_name)
-
-        if key_cols[0] in df.columns:
-            df.dropna(subset=key_cols, inplace=True)
-            df = df.drop_duplicates(subset=key_cols, keep="first")
-
-        check_duplicates(df, key_cols, table_name)
-
-    flag_errors(table_name)
-    df.to_parquet(os.path.join(silver_folder, out), index=False)
-    print(f" [OK] Saved: {out} ({len(df)} rows)")
-
-
-def combine_and_save_enterprise_transactions(
-    bronze_folder: str,
-    silver_folder: str,
-) -> None:
-    print("\n" + "=" * 70)
-    print("STAGE X: CONCATENATION (enterprise_order_merchant_tx)")
-    print("=" * 70)
-
-    file_pattern = os.path.join(
-        bronze_folder,
-        "enterprise_order_with_merchant_data*_bronze.parquet",
-    )
-    all_files = glob.glob(file_pattern)
-
-    list_of_dfs: list[pd.DataFrame] = []
-
-    print(f" [INFO] Found {len(all_files)} enterprise transaction parts to combine.")
-
-    for filename in all_files:
-        df_part = pd.read_parquet(filename)
-        df_part = standardize(df_part)
-
-        if "merchantid" in df_part.columns:
-            df_part = df_part.rename(columns={"merchantid": "merchant_id"})
-        if "staffid" in df_part.columns:
-            df_part = df_part.rename(columns={"staffid": "staff_id"})
-        if "orderid" in df_part.columns:
-            df_part = df_part.rename(columns={"orderid": "order_id"})
-
-        list_of_dfs.append(df_part)
-
-    if list_of_dfs:
-        combined_df = pd.concat(list_of_dfs, ignore_index=True)
-        out = "enterprise_order_merchant_tx.parquet"
-        combined_df.to_parquet(os.path.join(silver_folder, out), index=False)
-        print(f" [OK] Saved combined Silver file: {out} ({len(combined_df)} rows)")
-
-
-# =======================
-# OPERATIONS CLEANER
-# =======================
-
-def _rename_operations_columns(df: pd.DataFrame) -> pd.DataFrame:
-    rename_map: dict[str, str] = {}
-
-    if "orderid" in df.columns and "order_id" not in df.columns:
-        rename_map["orderid"] = "order_id"
-    if "productid" in df.columns and "product_id" not in df.columns:
-        rename_map["productid"] = "product_id"
-    if "prod_id" in df.columns and "product_id" not in df.columns:
-        rename_map["prod_id"] = "product_id"
-    if "sku" in df.columns and "product_id" not in df.columns:
-        rename_map["sku"] = "product_id"
-    if "item_id" in df.columns and "product_id" not in df.columns:
-        rename_map["item_id"] = "product_id"
-    if "userid" in df.columns and "user_id" not in df.columns:
-        rename_map["userid"] = "user_id"
-
-    if rename_map:
-        df = df.rename(columns=rename_map)
-        print(f" [INFO] Renamed columns: {rename_map}")
-
-    return df
-
-
-def clean_operations(df: pd.DataFrame, silver_folder: str, file: str) -> None:
-    """
-    Operations cleaning with fixed line item handling:
-    - quantity cleaned
-    - stable product_id
-    - buffering instead of overwrite
-    """
-    global operations_line_items_buffer
-
-    df = standardize(df)
-    df = _rename_operations_columns(df)
-
-    # ------------------
-    # ORDERS
-    # ------------------
-    if "order_data" in file:
-        table_name = "operations_orders"
-        print(f"\n Cleaning: {table_name}")
-        out = "operations_orders.parquet"
-        key_cols = ["order_id"]
-
-        df = validate_required_columns(df, key_cols, table_name)
-        df = check_nulls(df, key_cols, table_name)
-
-        if "order_id" in df.columns:
-            initial_rows = len(df)
-            df.dropna(subset=["order_id"], inplace=True)
-            removed = initial_rows - len(df)
-            if removed > 0:
-                print(
-                    f"  [CLEANING AUDIT] SUCCESS: "
-                    f"Removed {removed} rows with NULL order_id."
-                )
-
-        date_cols = [c for c in df.columns if "date" in c]
-        type_map = {c: "datetime" for c in date_cols}
-        if type_map:
-            df = validate_data_types(df, type_map, table_name)
-
-        check_duplicates(df, key_cols, table_name)
-        flag_errors(table_name)
-
-        df.to_parquet(os.path.join(silver_folder, out), index=False)
-        print(f" [OK] Saved: {out} ({len(df)} rows)")
-        return
-
-    # ------------------
-    # LINE ITEMS (with real product_id)
-    # ------------------
-    elif "line_item" in file:
-        table_name = "operations_line_items"
-        print(f"\n Cleaning: {table_name}")
-        out = "operations_line_items.parquet"
-        key_cols = ["order_id", "product_id"]
-
-        # Map raw column names to quantity/price if needed
-        if "quantity" not in df.columns:
-            for alt in ["qty", "quantity_purchased", "order_quantity", "item_quantity"]:
-                if alt in df.columns:
-                    df["quantity"] = df[alt]
-                    break
-
-        if "price" not in df.columns and "unit_price" in df.columns:
-            df["price"] = df["unit_price"]
-
-        # >>> NEW: map raw name column into product_name if available
-        if "product_name" not in df.columns:
-            for alt_name in ["item_name", "product", "product_desc", "item_desc"]:
-                if alt_name in df.columns:
-                    df["product_name"] = df[alt_name].astype(str)
-                    print(f" [INFO] Mapped {alt_name} -> product_name in operations_line_items")
-                    break
-
-        # Load product dim from Silver
-        try:
-            prod_path = os.path.join(silver_folder, "business_product.parquet")
-            prod_dim = pd.read_parquet(prod_path)
-            prod_dim = standardize(prod_dim)
-        except Exception as e:
-            log_quality(
-                table_name,
-                "PRODUCT_DIM_LOAD_ERROR",
-                f"Could not read business_product.parquet: {e}",
-                "ERROR",
-            )
-            return
-
-        # Map to real product_id if needed
-        if "product_id" not in df.columns:
-            if "product_name" in df.columns and "product_name" in prod_dim.columns:
-                df = df.merge(
-                    prod_dim[["product_id", "product_name"]],
-                    on="product_name",
-                    how="left",
-                )
-                print(" [INFO] Joined operations line items to business_product on product_name")
-            else:
-                # Prices-only files (order_id, price, quantity, no product_id/name)
-                # -> keep them in the buffer but mark product_id as order_id + index
-                if "order_id" in df.columns and "quantity" in df.columns and "price" in df.columns:
-                    df = df.reset_index(drop=True)
-                    df["product_id"] = (
-                        df["order_id"].astype(str) + "_" + df.index.astype(str)
-                    )
-                    print(
-                        " [INFO] Line-item prices file without product_id/product_name; "
-                        "synthetic product_id created from order_id + row index."
-                    )
-                else:
-                    print(
-                        " [WARN] Line-item file without product_id/product_name and "
-                        "no usable quantity; skipping this file."
-                    )
-                    return
-
-        # Clean quantity (now guaranteed to exist for prices files)
-        df = clean_quantity_column(df)
-
-        # Core validations
-        df = validate_required_columns(df, key_cols, table_name)
-        df = check_nulls(df, key_cols, table_name)
-
-        if set(key_cols).issubset(df.columns):
-            initial_rows = len(df)
-            df.dropna(subset=key_cols, inplace=True)
-            removed = initial_rows - len(df)
-            if removed > 0:
-                print(
-                    f"  [CLEANING AUDIT] SUCCESS: "
-                    f"Removed {removed} rows with NULL order/product keys."
-                )
-
-            initial_rows = len(df)
-            df.drop_duplicates(subset=key_cols, keep="first", inplace=True)
-            removed = initial_rows - len(df)
-            if removed > 0:
-                print(
-                    f"  [CLEANING AUDIT] SUCCESS: "
-                    f"Removed {removed} duplicates on order/product keys."
-                )
-
-        check_duplicates(df, key_cols, table_name)
-        flag_errors(table_name)
-
-        # Buffer for final write
-        df.reset_index(drop=True, inplace=True)
-        operations_line_items_buffer.append(df)
-        print(f" [INFO] Buffered {len(df)} line item rows")
-        return
-
-    
-    # ------------------
-    # ORDER DELAYS
-    # ------------------
-    elif "order_delays" in file:
-        table_name = "operations_order_delays"
-        print(f"\n Cleaning: {table_name}")
-        out = "operations_order_delays.parquet"
-
-        if "orderid" in df.columns and "order_id" not in df.columns:
-            df = df.rename(columns={"orderid": "order_id"})
-
-        initial_rows = len(df)
-        df = df.drop_duplicates()
-        removed = initial_rows - len(df)
-        if removed > 0:
-            print(
-                f"  [CLEANING AUDIT] SUCCESS: "
-                f"Removed {removed} duplicates (all columns)."
-            )
-
-        flag_errors(table_name)
-        df.to_parquet(os.path.join(silver_folder, out), index=False)
-        print(f" [OK] Saved: {out} ({len(df)} rows)")
-        return
-
-    else:
-        print(f" [WARN] Unknown operations file pattern: {file}")
-        return
-
-
-# =======================
-# MARKETING CLEANER
-# =======================
-
-def _rename_marketing_columns(df: pd.DataFrame, file: str) -> pd.DataFrame:
-    rename_map: dict[str, str] = {}
-
-    if "campaignid" in df.columns and "campaign_id" not in df.columns:
-        rename_map["campaignid"] = "campaign_id"
-    if "id" in df.columns and "campaign_id" not in df.columns and "campaign_data" in file:
-        rename_map["id"] = "campaign_id"
-    if "orderid" in df.columns and "order_id" not in df.columns:
-        rename_map["orderid"] = "order_id"
-    if "userid" in df.columns and "user_id" not in df.columns:
-        rename_map["userid"] = "user_id"
-
-    if rename_map:
-        df = df.rename(columns=rename_map)
-        print(f" [INFO] Renamed columns: {rename_map}")
-
-    return df
-
-
-def normalize_discount_label(s: str) -> str | None:
-    if s is None:
-        return None
-    s = str(s).strip().lower()
-    s = s.replace("percent", "%").replace("pct", "%")
-    s = re.sub(r"[^0-9%]", "", s)
-    if not s:
-        return None
-    m = re.search(r"(\d+)", s)
-    if not m:
-        return None
-    num = m.group(1)
-    return f"{num}%"
-
-
-def clean_marketing(df: pd.DataFrame, silver_folder: str, file: str) -> None:
-    df = standardize(df)
-    df = _rename_marketing_columns(df, file)
-
-    if "campaign_data" in file and "transactional" not in file:
-        table_name = "marketing_campaign"
-        print(f"\n Cleaning: {table_name}")
-        out = "marketing_campaign.parquet"
-        key_cols = ["campaign_id"]
-
-        if "campaign_id" not in df.columns:
-            if len(df.columns) == 1:
-                only_col = df.columns[0]
-                df["campaign_id"] = df[only_col].astype("category").cat.codes
-            else:
-                df["campaign_id"] = df.reset_index().index
-
-        df = validate_required_columns(df, key_cols, table_name)
-        df = check_nulls(df, key_cols, table_name)
-
-        if "discount" in df.columns:
-            df["discount_normalized"] = df["discount"].apply(normalize_discount_label)
-        else:
-            df["discount_normalized"] = None
-
-        check_duplicates(df, key_cols, table_name)
-
-    elif "transactional_campaign" in file:
-        table_name = "marketing_transactional_campaign"
-        print(f"\n Cleaning: {table_name}")
-        out = "marketing_transactional_campaign.parquet"
-
-        if "campaign_id" not in df.columns:
-            df["campaign_id"] = df.reset_index().index
-        if "order_id" not in df.columns:
-            df["order_id"] = df.reset_index().index
-
-        key_cols = [c for c in ["campaign_id", "order_id", "user_id"] if c in df.columns]
-
-        df = check_nulls(df, key_cols, table_name)
-        df = df.drop_duplicates()
-
-        check_duplicates(df, key_cols, table_name)
-
-    else:
-        print(f" [WARN] Unknown marketing file pattern: {file}")
-        return
-
-    flag_errors(table_name)
-    df.to_parquet(os.path.join(silver_folder, out), index=False)
-    print(f" [OK] Saved: {out} ({len(df)} rows)")
-
-
-# ======================
-# ROUTER / ORCHESTRATOR
-# ======================
-
-def cleaner(path: str, silver_folder: str) -> None:
-    file = os.path.basename(path).lower()
-    file = file.replace(" department_", "_")
-    file = file.replace(" department ", "_")
-
-    print(f" [ROUTER] Routing Bronze file: {file}")
-
-    while "  " in file:
-        file = file.replace("  ", " ")
-    file = file.replace(" ", "_")
-
-    try:
-        df = pd.read_parquet(path)
-
-        if file.startswith("business_"):
-            cleaner_func = clean_business
-        elif file.startswith(("customer_management_", "customer_")):
-            cleaner_func = clean_customer
-        elif file.startswith("enterprise_"):
-            cleaner_func = clean_enterprise
-        elif file.startswith("operations_"):
-            cleaner_func = clean_operations
-        elif file.startswith("marketing_"):
-            cleaner_func = clean_marketing
-        else:
-            print(f" [WARN] No cleaning logic for: {file}")
-            return
-
-        cleaner_func(df, silver_folder, file)
-
-    except Exception as e:
-        log_quality(file, "PROCESSING_ERROR", str(e), "ERROR")
-
-
-# ======================
-# PIPELINE ORCHESTRATOR
-# ======================
-
-def run_silver_pipeline(data_zone_path: str) -> None:
-    print("\n" + "=" * 70)
-    print("SILVER LAYER TRANSFORMATION PIPELINE")
-    print(f"Timestamp: {datetime.now().isoformat()}")
-    print("=" * 70)
-
-    bronze_folder = os.path.join(data_zone_path, "bronze_files")
-    silver_folder = os.path.join(data_zone_path, "silver_files")
-
-    os.makedirs(silver_folder, exist_ok=True)
-
-    if not os.path.exists(bronze_folder):
-        print(f" [ERROR] Bronze input path not found: {bronze_folder}")
-        return
-
-    bronze_files = [
-        f for f in os.listdir(bronze_folder)
-        if f.endswith(".parquet") and not f.startswith("_")
-    ]
-
-    for file in bronze_files:
-        cleaner(os.path.join(bronze_folder, file), silver_folder)
-
-    # Final write: line items buffer
-    if operations_line_items_buffer:
-        final_line_items = pd.concat(
-            operations_line_items_buffer,
-            ignore_index=True,
-        )
-        final_line_items.to_parquet(
-            os.path.join(silver_folder, "operations_line_items.parquet"),
-            index=False,
-        )
-        print(
-            f"[OK] Saved operations_line_items.parquet "
-            f"({len(final_line_items)} rows)"
-        )
-    else:
-        print("[WARN] No operations line items collected.")
-
-    combine_and_save_enterprise_transactions(bronze_folder, silver_folder)
-
-    save_quality_report(silver_folder)
-
-    print("\n" + "=" * 70)
-    print("SILVER LAYER COMPLETE")
-    print("=" * 70 + "\n")
-
-
-# ======================
-# MAIN
-# ======================
-
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser(
-        description="Silver Layer Transformation with Second Validation Checkpoint"
-    )
-    parser.add_argument("--data-zone", type=str, default=DATA_ZONE_PATH)
-    args = parser.parse_args()
-
-    run_silver_pipeline(args.data_zone)
+import os
+import re
+import argparse
+import functools
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+import glob
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Copy-on-write lets the non-inplace dropna/drop_duplicates chains below
+# share buffers until a write actually happens, instead of copying.
+pd.set_option("mode.copy_on_write", True)
+
+# ==================
+# CONFIG / CONSTANTS
+# ==================
+
+DATA_ZONE_PATH = "/app/data_zone"
+
+# ============
+# QUALITY LOGS
+# ============
+
+# Five parallel columns instead of a list of per-event dicts: half the
+# object overhead on noisy runs, picklable for the pool workers, and
+# already in the layout the Arrow writer wants.
+quality_report: dict[str, list] = {
+    "timestamp": [],
+    "table": [],
+    "issue_type": [],
+    "details": [],
+    "severity": [],
+}
+
+# ==============================
+# LINE ITEM BUFFER (ADDED FIX)
+# ==============================
+
+operations_line_items_buffer: list[pd.DataFrame] = []
+
+
+def log_quality(
+    table: str,
+    issue_type: str,
+    details: str,
+    severity: str = "WARNING",
+) -> None:
+    """Append a data-quality issue and print it."""
+    quality_report["timestamp"].append(datetime.now().isoformat())
+    quality_report["table"].append(table)
+    quality_report["issue_type"].append(issue_type)
+    quality_report["details"].append(details)
+    quality_report["severity"].append(severity)
+    print(f" [{severity}] {table} - {issue_type}: {details}")
+
+
+def save_quality_report(silver_folder: str) -> None:
+    """Persist quality_report to Parquet and print summary."""
+    if not quality_report["timestamp"]:
+        print("\n[INFO] No quality issues (errors/warnings) logged.")
+        return
+
+    report_path = os.path.join(
+        os.path.dirname(silver_folder), "_silver_quality_report.parquet"
+    )
+    # The columns already sit in Arrow-ready lists; table/issue_type/
+    # severity repeat heavily, so dictionary-encode them.
+    report = pa.table(
+        {
+            "timestamp": pa.array(quality_report["timestamp"]),
+            "table": pa.array(quality_report["table"]).dictionary_encode(),
+            "issue_type": pa.array(
+                quality_report["issue_type"]
+            ).dictionary_encode(),
+            "details": pa.array(quality_report["details"]),
+            "severity": pa.array(
+                quality_report["severity"]
+            ).dictionary_encode(),
+        }
+    )
+    pq.write_table(report, report_path, compression="zstd")
+
+    errors = sum(1 for s in quality_report["severity"] if s == "ERROR")
+    warnings = sum(1 for s in quality_report["severity"] if s == "WARNING")
+
+    print(f"\nQuality report saved: {report_path}")
+    print(f"Quality Summary: {errors} errors, {warnings} warnings")
+
+
+# ===========================
+# GENERIC TRANSFORM UTILITIES
+# ===========================
+
+# Whitespace/hyphen runs in raw column names, collapsed to one underscore.
+_COL_RE = re.compile(r"[\s\-]+")
+
+# First run of digits in messy quantity/discount strings; compiled once
+# so str.extract skips the per-call pattern lookup.
+_DIGITS_RE = re.compile(r"(\d+)")
+
+# Raw header tuple -> normalized names. Sources reuse the same handful
+# of schemas, so the regex work runs once per schema, not per file.
+_STD_CACHE: dict[tuple, list[str]] = {}
+
+
+def standardize(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalize column names and fix basic inconsistencies."""
+    key = tuple(df.columns)
+    normalized = _STD_CACHE.get(key)
+    if normalized is None:
+        # Whitespace is trimmed before the separator sub, like the old
+        # .str.strip() chain; leading underscores (the bronze audit
+        # columns _loaded_ts/_src_dept) must survive untouched.
+        normalized = [_COL_RE.sub("_", c.strip()).lower() for c in key]
+        _STD_CACHE[key] = normalized
+    df.columns = normalized
+    return df
+
+
+# Columns with few distinct values; stored as pandas category so parquet
+# writes them as dictionary-encoded pages instead of repeated strings.
+LOW_CARDINALITY_COLS = (
+    "state",
+    "country",
+    "gender",
+    "user_type",
+    "product_type",
+    "job_level",
+    "campaign_discount",
+)
+
+
+def _dictify(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast low-cardinality string columns to category before writing:
+    the known list unconditionally, plus any other object column whose
+    values repeat enough (< 50% distinct) to pay for dictionary pages.
+    """
+    known = set(LOW_CARDINALITY_COLS)
+    for col in LOW_CARDINALITY_COLS:
+        if col in df.columns and not isinstance(
+            df[col].dtype, pd.CategoricalDtype
+        ):
+            df[col] = df[col].astype("category")
+    for col in df.columns[df.dtypes == object]:
+        if col not in known:
+            s = df[col]
+            if s.nunique(dropna=True) * 2 < len(s):
+                df[col] = s.astype("category")
+    return df
+
+
+def _write(df: pd.DataFrame, silver_folder: str, out: str) -> None:
+    """
+    Single choke point for Silver parquet writes: dictionary-encoded
+    string pages and zstd level 3, which is smaller than snappy and
+    cheaper for the gold layer to decompress.
+    """
+    df = _dictify(df)
+    # write_table directly: explicit row groups keep gold's batch reads
+    # bounded, and the statistics let it skip row groups by min/max.
+    pq.write_table(
+        pa.Table.from_pandas(df, preserve_index=False),
+        os.path.join(silver_folder, out),
+        compression="zstd",
+        compression_level=3,
+        use_dictionary=True,
+        data_page_size=1 << 20,
+        write_statistics=True,
+        row_group_size=512_000,
+    )
+
+
+def validate_required_columns(
+    df: pd.DataFrame,
+    required_cols: list[str],
+    table_name: str,
+) -> pd.DataFrame:
+    cols = set(df.columns)
+    missing = [c for c in required_cols if c not in cols]
+    if missing:
+        log_quality(
+            table_name,
+            "MISSING_COLUMNS",
+            f"Missing required: {missing}",
+            "ERROR",
+        )
+    return df
+
+
+def _dup_count(block: pd.DataFrame) -> int:
+    """
+    Duplicate count as rows minus distinct keys — one hashtable build,
+    no boolean mask and no sort of the factorized codes.
+    """
+    if block.shape[1] == 1:
+        distinct = block.iloc[:, 0].nunique(dropna=False)
+    else:
+        distinct = len(
+            block.groupby(list(block.columns), sort=False, dropna=False).size()
+        )
+    return len(block) - distinct
+
+
+def _dedupe_keys(
+    df: pd.DataFrame,
+    keys: list[str],
+    na_keys: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Fused dropna-on-keys + drop_duplicates-on-keys: both masks are
+    computed on the input and combined, so the frame is copied once by
+    a single .loc selection instead of twice. The audit prints report
+    the two components separately like the inline copies did.
+    """
+    na_keys = na_keys or keys
+    valid = df[na_keys].notna().to_numpy().all(axis=1)
+    dup = df.duplicated(subset=keys, keep="first").to_numpy()
+
+    null_removed = len(df) - int(valid.sum())
+    dup_removed = int((valid & dup).sum())
+    if null_removed or dup_removed:
+        df = df.loc[valid & ~dup]
+    if null_removed:
+        print(
+            f"  [CLEANING AUDIT] SUCCESS: Removed {null_removed} rows "
+            f"with NULL {'/'.join(na_keys)}."
+        )
+    if dup_removed:
+        print(
+            f"  [CLEANING AUDIT] SUCCESS: Removed {dup_removed} duplicates "
+            f"on {keys}. Final Rows: {len(df)}"
+        )
+    return df
+
+
+def _coerce_datetime(series: pd.Series) -> pd.Series:
+    """
+    Cast to timestamp through Arrow's vectorized parser; columns with
+    values Arrow cannot read fall back to pandas' per-value coercion.
+    """
+    try:
+        arr = pa.array(series, from_pandas=True)
+        if not pa.types.is_temporal(arr.type):
+            arr = arr.cast(pa.timestamp("us"))
+        return pd.Series(arr.to_numpy(zero_copy_only=False), index=series.index)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return pd.to_datetime(series, errors="coerce")
+
+
+def _coerce_numeric(series: pd.Series) -> pd.Series:
+    """Same idea as _coerce_datetime, casting to float64."""
+    try:
+        arr = pa.array(series, from_pandas=True)
+        if not (
+            pa.types.is_integer(arr.type)
+            or pa.types.is_floating(arr.type)
+            or pa.types.is_decimal(arr.type)
+        ):
+            arr = arr.cast(pa.float64())
+        return pd.Series(arr.to_numpy(zero_copy_only=False), index=series.index)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return pd.to_numeric(series, errors="coerce")
+
+
+def validate_data_types(
+    df: pd.DataFrame,
+    type_map: dict[str, str],
+    table_name: str,
+) -> pd.DataFrame:
+    present = {c: t for c, t in type_map.items() if c in df.columns}
+    dt_cols = [c for c, t in present.items() if t == "datetime"]
+
+    # Orders tables carry several date columns; the Arrow/pandas parsers
+    # release the GIL, so coerce them concurrently instead of in series.
+    coerced: dict[str, pd.Series] = {}
+    if len(dt_cols) > 1:
+        with ThreadPoolExecutor(max_workers=min(4, len(dt_cols))) as ex:
+            coerced = dict(
+                zip(dt_cols, ex.map(lambda c: _coerce_datetime(df[c]), dt_cols))
+            )
+
+    for col, expected_type in present.items():
+        if expected_type == "datetime":
+            parsed = (
+                coerced[col] if col in coerced else _coerce_datetime(df[col])
+            )
+            issue, placeholder = "INVALID_DATETIME", "NaT"
+        elif expected_type == "numeric":
+            parsed = _coerce_numeric(df[col])
+            issue, placeholder = "INVALID_NUMERIC", "NaN"
+        else:
+            continue
+
+        # One reduction instead of before/after notnull sums: invalid
+        # rows are exactly those populated before but null after.
+        invalid = int(
+            (df[col].notna().to_numpy() & parsed.isna().to_numpy()).sum()
+        )
+        df[col] = parsed
+        if invalid > 0:
+            log_quality(
+                table_name,
+                issue,
+                f"{col}: {invalid} values coerced to {placeholder}",
+                "WARNING",
+            )
+    return df
+
+
+def _validate_batch(
+    df: pd.DataFrame,
+    key_cols: list[str],
+    table_name: str,
+    type_map: dict[str, str] | None = None,
+) -> pd.DataFrame:
+    """
+    Fused validation: null counts, duplicate count and type coercions in
+    one call over the key-column block, instead of the separate null,
+    duplicate and type scans the cleaners used to run.
+    """
+    present = [c for c in key_cols if c in df.columns]
+    if present:
+        block = df[present]
+        total = len(df)
+
+        null_counts = block.isna().to_numpy().sum(axis=0)
+        for col, null_count in zip(present, null_counts):
+            if null_count > 0:
+                pct = (null_count / total) * 100
+                log_quality(
+                    table_name,
+                    "NULL_VALUES",
+                    f"{col}: {null_count}/{total} ({pct:.1f}%) nulls",
+                    "WARNING",
+                )
+
+        if len(present) == len(key_cols):
+            dup_count = _dup_count(block)
+            if dup_count > 0:
+                log_quality(
+                    table_name,
+                    "DUPLICATES",
+                    f"{dup_count} duplicate rows on {key_cols}",
+                    "WARNING",
+                )
+
+    if type_map:
+        df = validate_data_types(df, type_map, table_name)
+
+    return df
+
+
+def flag_errors(table_name: str) -> None:
+    errors = sum(
+        1
+        for tbl, sev in zip(quality_report["table"], quality_report["severity"])
+        if tbl == table_name and sev == "ERROR"
+    )
+    if errors:
+        print(f" [ERROR] {errors} ERRORS flagged for {table_name}")
+
+
+# ===========================
+# QUANTITY CLEANER (FIXED)
+# ===========================
+
+def clean_quantity_column(df: pd.DataFrame) -> pd.DataFrame:
+    # Map various raw names into quantity
+    if "quantity" not in df.columns:
+        cols = set(df.columns)
+        for alt in ["qty", "quantity_purchased", "order_quantity", "item_quantity"]:
+            if alt in cols:
+                df["quantity"] = df[alt]
+                break
+
+    if "quantity" not in df.columns:
+        df["quantity"] = pd.NA
+        return df
+
+    # If already numeric, just coerce and DO NOT force Int64 (keep float/int)
+    if pd.api.types.is_numeric_dtype(df["quantity"]):
+        df["quantity"] = pd.to_numeric(df["quantity"], errors="coerce")
+        return df
+
+    # Fast path first: most string quantities are plain numbers, which
+    # to_numeric parses in C. Only rows it rejects (e.g. "3 units") pay
+    # for the regex extract.
+    raw = df["quantity"]
+    parsed = pd.to_numeric(raw, errors="coerce")
+    bad = parsed.isna() & raw.notna()
+    if bad.any():
+        extracted = raw[bad].astype(str).str.extract(_DIGITS_RE, expand=False)
+        parsed.loc[bad] = pd.to_numeric(extracted, errors="coerce")
+    df["quantity"] = parsed
+    return df
+
+
+# ===========================
+# BUSINESS / CUSTOMER CLEANERS
+# ===========================
+
+def clean_business(df: pd.DataFrame, silver_folder: str, file: str) -> None:
+    table_name = "business_product"
+    print(f"\n Cleaning: {table_name}")
+
+    df = standardize(df)
+    df = validate_required_columns(df, ["product_id", "product_name"], table_name)
+    df = _validate_batch(df, ["product_id"], table_name)
+
+    if "product_id" in df.columns:
+        df = _dedupe_keys(df, ["product_id"])
+
+    flag_errors(table_name)
+
+    out = "business_product.parquet"
+    _write(df, silver_folder, out)
+    print(f" [OK] Saved: {out} ({len(df)} rows)")
+
+
+# Compiled once; alternation order keeps the old if/elif precedence
+# (user_job before user_credit_card before the generic user_ fallback).
+_CUSTOMER_RE = re.compile(r"user_job|user_credit_card|user_data|user_")
+
+_CUSTOMER_TABLES: dict[str, tuple[str, str, list[str]]] = {
+    "user_job": ("customer_user_job", "customer_user_job.parquet", ["user_id"]),
+    "user_credit_card": (
+        "customer_user_credit_card",
+        "customer_user_credit_card.parquet",
+        ["user_id", "credit_card_number"],
+    ),
+    "user_data": ("customer_user", "customer_user.parquet", ["user_id"]),
+    "user_": ("customer_user", "customer_user.parquet", ["user_id"]),
+}
+
+
+def clean_customer(df: pd.DataFrame, silver_folder: str, file: str) -> None:
+    df = standardize(df)
+
+    m = _CUSTOMER_RE.search(file)
+    if m is None:
+        print(f" [WARN] Unknown customer file pattern: {file}")
+        return
+
+    table_name, out, key_cols = _CUSTOMER_TABLES[m.group(0)]
+    print(f"\n Cleaning: {table_name}")
+
+    df = validate_required_columns(df, ["user_id"], table_name)
+    birthdate_map = (
+        {"birthdate": "datetime"}
+        if table_name == "customer_user" and "birthdate" in df.columns
+        else None
+    )
+    df = _validate_batch(df, key_cols, table_name, type_map=birthdate_map)
+
+    if "user_id" in df.columns:
+        subset_keys = (
+            ["user_id"]
+            if table_name in ["customer_user", "customer_user_job"]
+            else key_cols
+        )
+        df = _dedupe_keys(df, subset_keys, na_keys=["user_id"])
+
+    flag_errors(table_name)
+
+    _write(df, silver_folder, out)
+    print(f" [OK] Saved: {out} ({len(df)} rows)")
+
+
+# =======================
+# ENTERPRISE CLEANER
+# =======================
+
+# One compiled scan per cleaner instead of a ladder of substring checks.
+_ENTERPRISE_RE = re.compile(r"order_with_merchant|merchant_data|staff_data")
+_OPERATIONS_RE = re.compile(r"order_data|line_item|order_delays")
+_MARKETING_RE = re.compile(r"transactional_campaign|campaign_data")
+
+# Dimension specs resolved at import time, mirroring _CUSTOMER_TABLES:
+# (table_name, output file, key columns) per matched kind.
+_ENTERPRISE_DIMS: dict[str, tuple[str, str, list[str]]] = {
+    "merchant_data": (
+        "enterprise_merchant",
+        "enterprise_merchant.parquet",
+        ["merchant_id"],
+    ),
+    "staff_data": (
+        "enterprise_staff",
+        "enterprise_staff.parquet",
+        ["staff_id"],
+    ),
+}
+
+
+def clean_enterprise(df: pd.DataFrame, silver_folder: str, file: str) -> None:
+    df = standardize(df)
+
+    m = _ENTERPRISE_RE.search(file)
+    kind = m.group(0) if m else None
+
+    if kind == "order_with_merchant":
+        table_name = "enterprise_order_merchant_tx"
+        print(f"\n Cleaning: {table_name} (Transaction/Fact)")
+
+        rename_map: dict[str, str] = {}
+        if "merchantid" in df.columns:
+            rename_map["merchantid"] = "merchant_id"
+        if "staffid" in df.columns:
+            rename_map["staffid"] = "staff_id"
+        if "orderid" in df.columns:
+            rename_map["orderid"] = "order_id"
+        if rename_map:
+            df = df.rename(columns=rename_map)
+
+        key_cols = ["order_id", "merchant_id"]
+        df = validate_required_columns(df, key_cols, table_name)
+        df = _validate_batch(df, key_cols, table_name)
+
+        if "order_id" in df.columns:
+            df = _dedupe_keys(df, ["order_id"])
+
+        base_name = file.replace(".parquet", "").replace("enterprise_", "")
+        out = f"enterprise_{base_name}_tx.parquet"
+
+    elif kind in _ENTERPRISE_DIMS:
+        table_name, out, key_cols = _ENTERPRISE_DIMS[kind]
+        print(f"\n Cleaning: {table_name} (Dimension)")
+
+    else:
+        print(f" [WARN] Unknown enterprise file pattern: {file}")
+        return
+
+    if kind in _ENTERPRISE_DIMS:
+        df = validate_required_columns(df, key_cols, table_name)
+        df = _validate_batch(df, key_cols, table_name)
+
+        if key_cols[0] in df.columns:
+            df = _dedupe_keys(df, key_cols)
+
+    flag_errors(table_name)
+    _write(df, silver_folder, out)
+    print(f" [OK] Saved: {out} ({len(df)} rows)")
+
+
+def combine_and_save_enterprise_transactions(
+    bronze_folder: str,
+    silver_folder: str,
+) -> None:
+    print("\n" + "=" * 70)
+    print("STAGE X: CONCATENATION (enterprise_order_merchant_tx)")
+    print("=" * 70)
+
+    file_pattern = os.path.join(
+        bronze_folder,
+        "enterprise_order_with_merchant_data*_bronze.parquet",
+    )
+    # The combine step only normalizes column names, so it never needs a
+    # pandas frame at all: stream each part batch-by-batch through one
+    # ParquetWriter. Peak memory is one batch instead of every part plus
+    # the concat copy.
+    out = "enterprise_order_merchant_tx.parquet"
+    out_path = os.path.join(silver_folder, out)
+    renames = {
+        "merchantid": "merchant_id",
+        "staffid": "staff_id",
+        "orderid": "order_id",
+    }
+
+    part_files = []
+    for filename in sorted(glob.glob(file_pattern)):
+        pf = pq.ParquetFile(filename)
+        names = [
+            _COL_RE.sub("_", c.strip()).lower()
+            for c in pf.schema_arrow.names
+        ]
+        names = [renames.get(c, c) for c in names]
+        part_files.append((pf, names))
+
+    if not part_files:
+        return
+
+    # The parts come from different raw exports and do not all share a
+    # schema (one CSV-derived part carries a stray index column), so the
+    # writer schema is the permissive union of every part's renamed
+    # schema — same as the line-items writer — not whichever file the
+    # glob happened to yield first.
+    schema = pa.unify_schemas(
+        [
+            pa.schema(
+                [
+                    pa.field(n, pf.schema_arrow.field(i).type)
+                    for i, n in enumerate(names)
+                ]
+            )
+            for pf, names in part_files
+        ],
+        promote_options="permissive",
+    )
+
+    writer = pq.ParquetWriter(
+        out_path, schema, compression="zstd", use_dictionary=True
+    )
+    total_rows = 0
+    try:
+        for pf, names in part_files:
+            for batch in pf.iter_batches(batch_size=256_000):
+                tbl = pa.Table.from_batches([batch]).rename_columns(names)
+                # Pad columns this part lacks with nulls, then shape to
+                # the unified schema.
+                for field in schema:
+                    if field.name not in tbl.column_names:
+                        tbl = tbl.append_column(
+                            field, pa.nulls(tbl.num_rows, field.type)
+                        )
+                tbl = tbl.select(schema.names).cast(schema, safe=False)
+                writer.write_table(tbl)
+                total_rows += tbl.num_rows
+    finally:
+        writer.close()
+
+    print(
+        f" [OK] Saved combined Silver file: {out} "
+        f"({total_rows} rows from {len(part_files)} parts)"
+    )
+
+
+# =======================
+# OPERATIONS CLEANER
+# =======================
+
+# Raw -> canonical operations column names; applied only where the
+# canonical name is not already present.
+_OPS_RENAME = {
+    "orderid": "order_id",
+    "productid": "product_id",
+    "prod_id": "product_id",
+    "sku": "product_id",
+    "item_id": "product_id",
+    "userid": "user_id",
+}
+
+
+def _rename_operations_columns(df: pd.DataFrame) -> pd.DataFrame:
+    cols = set(df.columns)
+    rename_map = {
+        k: v for k, v in _OPS_RENAME.items() if k in cols and v not in cols
+    }
+
+    if rename_map:
+        df = df.rename(columns=rename_map)
+        print(f" [INFO] Renamed columns: {rename_map}")
+
+    return df
+
+
+@functools.lru_cache(maxsize=4)
+def _load_product_dim(path: str, mtime: float) -> pd.DataFrame:
+    """
+    Cached read of business_product.parquet, keyed on mtime so a
+    rewritten dim invalidates the entry. Saves one read + standardize
+    per line-items part within a worker.
+    """
+    return standardize(pd.read_parquet(path))
+
+
+def clean_operations(df: pd.DataFrame, silver_folder: str, file: str) -> None:
+    """
+    Operations cleaning with fixed line item handling:
+    - quantity cleaned
+    - stable product_id
+    - buffering instead of overwrite
+    """
+    global operations_line_items_buffer
+
+    df = standardize(df)
+    df = _rename_operations_columns(df)
+
+    m = _OPERATIONS_RE.search(file)
+    kind = m.group(0) if m else None
+
+    # ------------------
+    # ORDERS
+    # ------------------
+    if kind == "order_data":
+        table_name = "operations_orders"
+        print(f"\n Cleaning: {table_name}")
+        out = "operations_orders.parquet"
+        key_cols = ["order_id"]
+
+        df = validate_required_columns(df, key_cols, table_name)
+        date_cols = [c for c in df.columns if "date" in c]
+        df = _validate_batch(
+            df,
+            key_cols,
+            table_name,
+            type_map={c: "datetime" for c in date_cols},
+        )
+
+        if "order_id" in df.columns:
+            initial_rows = len(df)
+            df = df.dropna(subset=["order_id"])
+            removed = initial_rows - len(df)
+            if removed > 0:
+                print(
+                    f"  [CLEANING AUDIT] SUCCESS: "
+                    f"Removed {removed} rows with NULL order_id."
+                )
+
+        flag_errors(table_name)
+
+        _write(df, silver_folder, out)
+        print(f" [OK] Saved: {out} ({len(df)} rows)")
+        return
+
+    # ------------------
+    # LINE ITEMS (with real product_id)
+    # ------------------
+    elif kind == "line_item":
+        table_name = "operations_line_items"
+        print(f"\n Cleaning: {table_name}")
+        out = "operations_line_items.parquet"
+        key_cols = ["order_id", "product_id"]
+
+        # One hashed column set for the whole mapping block instead of a
+        # fresh Index probe per membership test; kept in sync on adds.
+        cols = set(df.columns)
+
+        # Map raw column names to quantity/price if needed
+        if "quantity" not in cols:
+            for alt in ["qty", "quantity_purchased", "order_quantity", "item_quantity"]:
+                if alt in cols:
+                    df["quantity"] = df[alt]
+                    cols.add("quantity")
+                    break
+
+        if "price" not in cols and "unit_price" in cols:
+            df["price"] = df["unit_price"]
+            cols.add("price")
+
+        # >>> NEW: map raw name column into product_name if available
+        if "product_name" not in cols:
+            for alt_name in ["item_name", "product", "product_desc", "item_desc"]:
+                if alt_name in cols:
+                    df["product_name"] = df[alt_name].astype(str)
+                    cols.add("product_name")
+                    print(f" [INFO] Mapped {alt_name} -> product_name in operations_line_items")
+                    break
+
+        # Load product dim from Silver
+        try:
+            prod_path = os.path.join(silver_folder, "business_product.parquet")
+            prod_dim = _load_product_dim(prod_path, os.path.getmtime(prod_path))
+        except Exception as e:
+            log_quality(
+                table_name,
+                "PRODUCT_DIM_LOAD_ERROR",
+                f"Could not read business_product.parquet: {e}",
+                "ERROR",
+            )
+            return
+
+        # Map to real product_id if needed
+        if "product_id" not in cols:
+            if "product_name" in cols and "product_name" in prod_dim.columns:
+                # name -> id is a small 1:1 lookup; Series.map skips the
+                # hash join and the full-frame copy a merge would make.
+                name_to_id = dict(
+                    zip(prod_dim["product_name"], prod_dim["product_id"])
+                )
+                df["product_id"] = df["product_name"].map(name_to_id)
+                print(" [INFO] Mapped operations line items to business_product on product_name")
+            else:
+                # Prices-only files (order_id, price, quantity, no product_id/name)
+                # -> keep them in the buffer but mark product_id as order_id + index
+                if {"order_id", "quantity", "price"} <= cols:
+                    df = df.reset_index(drop=True)
+                    # Arrow-backed strings concatenate in one contiguous
+                    # buffer instead of allocating three object Series.
+                    row_no = pd.Series(
+                        pd.RangeIndex(len(df)).astype("string[pyarrow]")
+                    )
+                    df["product_id"] = (
+                        df["order_id"].astype("string[pyarrow]") + "_" + row_no
+                    )
+                    print(
+                        " [INFO] Line-item prices file without product_id/product_name; "
+                        "synthetic product_id created from order_id + row index."
+                    )
+                else:
+                    print(
+                        " [WARN] Line-item file without product_id/product_name and "
+                        "no usable quantity; skipping this file."
+                    )
+                    return
+
+        # Clean quantity (now guaranteed to exist for prices files)
+        df = clean_quantity_column(df)
+
+        # Core validations
+        df = validate_required_columns(df, key_cols, table_name)
+        df = _validate_batch(df, key_cols, table_name)
+
+        if set(key_cols).issubset(df.columns):
+            df = _dedupe_keys(df, key_cols)
+
+        flag_errors(table_name)
+
+        # Buffer for final write
+        df = df.reset_index(drop=True)
+        operations_line_items_buffer.append(df)
+        print(f" [INFO] Buffered {len(df)} line item rows")
+        return
+
+    
+    # order_delays is a pure passthrough and is intercepted by the
+    # router before pandas ever sees it (_clean_order_delays_arrow).
+    else:
+        print(f" [WARN] Unknown operations file pattern: {file}")
+        return
+
+
+def _clean_order_delays_arrow(path: str, silver_folder: str) -> None:
+    """
+    Pure-Arrow passthrough for order_delays: the only cleaning is a
+    rename and an all-column dedupe, so skip the Arrow->pandas->Arrow
+    roundtrip and do both on the table directly.
+    """
+    table_name = "operations_order_delays"
+    print(f"\n Cleaning: {table_name}")
+    out = "operations_order_delays.parquet"
+
+    tbl = pq.read_table(path)
+    names = [_COL_RE.sub("_", c.strip()).lower() for c in tbl.column_names]
+    if "orderid" in names and "order_id" not in names:
+        names = ["order_id" if c == "orderid" else c for c in names]
+    tbl = tbl.rename_columns(names)
+
+    before = tbl.num_rows
+    # Grouping on every column with no aggregates is Arrow's columnar
+    # distinct; row order is not meaningful for this table.
+    tbl = tbl.group_by(tbl.column_names).aggregate([])
+    removed = before - tbl.num_rows
+    if removed > 0:
+        print(
+            f"  [CLEANING AUDIT] SUCCESS: "
+            f"Removed {removed} duplicates (all columns)."
+        )
+
+    pq.write_table(
+        tbl,
+        os.path.join(silver_folder, out),
+        compression="zstd",
+        use_dictionary=True,
+    )
+    print(f" [OK] Saved: {out} ({tbl.num_rows} rows)")
+
+
+# =======================
+# MARKETING CLEANER
+# =======================
+
+_MKT_RENAME = {
+    "campaignid": "campaign_id",
+    "orderid": "order_id",
+    "userid": "user_id",
+}
+
+
+def _rename_marketing_columns(df: pd.DataFrame, file: str) -> pd.DataFrame:
+    cols = set(df.columns)
+    rename_map = {
+        k: v for k, v in _MKT_RENAME.items() if k in cols and v not in cols
+    }
+    # A bare "id" column only means campaign_id in campaign_data files.
+    if "id" in cols and "campaign_id" not in cols and "campaign_data" in file:
+        rename_map["id"] = "campaign_id"
+
+    if rename_map:
+        df = df.rename(columns=rename_map)
+        print(f" [INFO] Renamed columns: {rename_map}")
+
+    return df
+
+
+def normalize_discount_labels(s: pd.Series) -> pd.Series:
+    """
+    Vectorized discount normalisation: lowercase, spell out percent/pct
+    as %, pull the first digit run and suffix it with %. Values without
+    digits come back as <NA>. C-level string kernels throughout instead
+    of a Python function call per row.
+    """
+    s = s.astype("string").str.strip().str.lower()
+    s = s.str.replace("percent", "%", regex=False)
+    s = s.str.replace("pct", "%", regex=False)
+    nums = s.str.extract(_DIGITS_RE, expand=False)
+    return nums + "%"
+
+
+def clean_marketing(df: pd.DataFrame, silver_folder: str, file: str) -> None:
+    df = standardize(df)
+    df = _rename_marketing_columns(df, file)
+
+    m = _MARKETING_RE.search(file)
+    # Leftmost match: transactional_campaign files match before the
+    # plain campaign_data alternative, preserving the old precedence.
+    kind = m.group(0) if m else None
+
+    if kind == "campaign_data":
+        table_name = "marketing_campaign"
+        print(f"\n Cleaning: {table_name}")
+        out = "marketing_campaign.parquet"
+        key_cols = ["campaign_id"]
+
+        if "campaign_id" not in df.columns:
+            if len(df.columns) == 1:
+                only_col = df.columns[0]
+                # factorize returns the codes directly, without building
+                # (and discarding) a Categorical and its sorted categories.
+                df["campaign_id"] = pd.factorize(df[only_col], sort=False)[0]
+            else:
+                # arange gives the sequential ids directly; reset_index()
+                # would copy the whole frame just to read its RangeIndex.
+                df["campaign_id"] = np.arange(len(df), dtype=np.int64)
+
+        df = validate_required_columns(df, key_cols, table_name)
+        df = _validate_batch(df, key_cols, table_name)
+
+        if "discount" in df.columns:
+            df["discount_normalized"] = normalize_discount_labels(df["discount"])
+        else:
+            df["discount_normalized"] = None
+
+    elif kind == "transactional_campaign":
+        table_name = "marketing_transactional_campaign"
+        print(f"\n Cleaning: {table_name}")
+        out = "marketing_transactional_campaign.parquet"
+
+        if "campaign_id" not in df.columns:
+            df["campaign_id"] = np.arange(len(df), dtype=np.int64)
+        if "order_id" not in df.columns:
+            df["order_id"] = np.arange(len(df), dtype=np.int64)
+
+        key_cols = [c for c in ["campaign_id", "order_id", "user_id"] if c in df.columns]
+
+        df = _validate_batch(df, key_cols, table_name)
+        df = df.drop_duplicates()
+
+    else:
+        print(f" [WARN] Unknown marketing file pattern: {file}")
+        return
+
+    flag_errors(table_name)
+    _write(df, silver_folder, out)
+    print(f" [OK] Saved: {out} ({len(df)} rows)")
+
+
+# ======================
+# ROUTER / ORCHESTRATOR
+# ======================
+
+# Prefix -> cleaner dispatch table; the anchored alternation matches all
+# known prefixes in one pass (longer alternatives first, so
+# customer_management_ wins over customer_).
+_PREFIX_DISPATCH: dict[str, object] = {
+    "business_": clean_business,
+    "customer_management_": clean_customer,
+    "customer_": clean_customer,
+    "enterprise_": clean_enterprise,
+    "operations_": clean_operations,
+    "marketing_": clean_marketing,
+}
+_PREFIX_RE = re.compile("^(" + "|".join(_PREFIX_DISPATCH) + ")")
+
+
+def cleaner(path: str, silver_folder: str) -> None:
+    file = os.path.basename(path).lower()
+    file = file.replace(" department_", "_")
+    file = file.replace(" department ", "_")
+
+    print(f" [ROUTER] Routing Bronze file: {file}")
+
+    while "  " in file:
+        file = file.replace("  ", " ")
+    file = file.replace(" ", "_")
+
+    # Only the IO/parse failures we expect are caught; a bug in a
+    # cleaner should raise loudly instead of hiding in the quality log
+    # (and the broad try/except kept the hot loop from specializing).
+    try:
+        # Passthrough tables never need pandas at all.
+        if file.startswith("operations_") and "order_delays" in file:
+            _clean_order_delays_arrow(path, silver_folder)
+            return
+
+        df = pd.read_parquet(path)
+    except (OSError, pa.ArrowInvalid, ValueError) as e:
+        log_quality(file, "PROCESSING_ERROR", str(e), "ERROR")
+        return
+
+    m = _PREFIX_RE.match(file)
+    if m:
+        _PREFIX_DISPATCH[m.group(1)](df, silver_folder, file)
+        return
+
+    print(f" [WARN] No cleaning logic for: {file}")
+
+
+def _output_group_key(name: str) -> str:
+    """
+    Bronze parts that differ only by a part number write the same silver
+    output (all operations_order_data* files map to
+    operations_orders.parquet), so they must never clean concurrently.
+    Stripping the digits groups such parts under one key.
+    """
+    return re.sub(r"\d+", "", name.lower())
+
+
+def _process_bronze_group(
+    paths: list[str],
+    silver_folder: str,
+) -> tuple[dict[str, list], list[pd.DataFrame]]:
+    """
+    Worker entry point for the process pool. Runs one output group's
+    files in order with fresh module state and returns whatever they
+    logged or buffered, so the parent can merge results instead of
+    sharing globals.
+    """
+    for col in quality_report.values():
+        col.clear()
+    operations_line_items_buffer.clear()
+    for path in paths:
+        cleaner(path, silver_folder)
+    return (
+        {k: list(v) for k, v in quality_report.items()},
+        list(operations_line_items_buffer),
+    )
+
+
+# ======================
+# PIPELINE ORCHESTRATOR
+# ======================
+
+def run_silver_pipeline(data_zone_path: str) -> None:
+    print("\n" + "=" * 70)
+    print("SILVER LAYER TRANSFORMATION PIPELINE")
+    print(f"Timestamp: {datetime.now().isoformat()}")
+    print("=" * 70)
+
+    bronze_folder = os.path.join(data_zone_path, "bronze_files")
+    silver_folder = os.path.join(data_zone_path, "silver_files")
+
+    os.makedirs(silver_folder, exist_ok=True)
+
+    if not os.path.exists(bronze_folder):
+        print(f" [ERROR] Bronze input path not found: {bronze_folder}")
+        return
+
+    # scandir's DirEntry carries the file type from the directory read
+    # itself, so filtering to regular files costs no extra stat calls.
+    # Sorted so the run order (and everything downstream of it) never
+    # depends on directory enumeration order.
+    with os.scandir(bronze_folder) as it:
+        bronze_paths = sorted(
+            e.path for e in it
+            if e.is_file(follow_symlinks=False)
+            and e.name.endswith(".parquet")
+            and not e.name.startswith("_")
+        )
+
+    # Files in different output groups are independent, but parts that
+    # share a silver output must run serially (and in sorted order, so
+    # the surviving content is deterministic like the baseline loop's).
+    # Line-item cleaning additionally reads business_product.parquet,
+    # so the business groups run as a first wave before the rest fan
+    # out across the process pool.
+    groups: dict[str, list[str]] = {}
+    for p in bronze_paths:
+        key = _output_group_key(os.path.basename(p))
+        groups.setdefault(key, []).append(p)
+    group_lists = list(groups.values())
+
+    first_wave = [
+        g for g in group_lists
+        if os.path.basename(g[0]).lower().startswith("business_")
+    ]
+    second_wave = [g for g in group_lists if g not in first_wave]
+
+    li_frames: list[pd.DataFrame] = []
+    for wave in (first_wave, second_wave):
+        if not wave:
+            continue
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+            results = ex.map(
+                _process_bronze_group, wave, [silver_folder] * len(wave)
+            )
+            for rows, buffered in results:
+                for k, vals in rows.items():
+                    quality_report[k].extend(vals)
+                li_frames.extend(buffered)
+
+    # The output schema must be the union of every part's columns —
+    # fixing it from whichever frame arrived first silently dropped
+    # columns only later parts carried. Unify the schemas first, then
+    # write the frames one by one, releasing each as it goes; peak
+    # memory is the collected frames, still without the concat copy.
+    if li_frames:
+        li_path = os.path.join(silver_folder, "operations_line_items.parquet")
+        li_schema = pa.unify_schemas(
+            [
+                pa.Schema.from_pandas(f, preserve_index=False)
+                for f in li_frames
+            ],
+            promote_options="permissive",
+        )
+        li_rows = 0
+        li_writer = pq.ParquetWriter(
+            li_path,
+            li_schema,
+            compression="zstd",
+            use_dictionary=True,
+        )
+        try:
+            while li_frames:
+                li_df = li_frames.pop(0).reindex(columns=li_schema.names)
+                tbl = pa.Table.from_pandas(
+                    li_df, preserve_index=False
+                ).cast(li_schema, safe=False)
+                li_writer.write_table(tbl)
+                li_rows += tbl.num_rows
+        finally:
+            li_writer.close()
+        print(f"[OK] Saved operations_line_items.parquet ({li_rows} rows)")
+    else:
+        print("[WARN] No operations line items collected.")
+
+    combine_and_save_enterprise_transactions(bronze_folder, silver_folder)
+
+    save_quality_report(silver_folder)
+
+    print("\n" + "=" * 70)
+    print("SILVER LAYER COMPLETE")
+    print("=" * 70 + "\n")
+
+
+# ======================
+# MAIN
+# ======================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Silver Layer Transformation with Second Validation Checkpoint"
+    )
+    parser.add_argument("--data-zone", type=str, default=DATA_ZONE_PATH)
+    args = parser.parse_args()
+
+    run_silver_pipeline(args.data_zone)